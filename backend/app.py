@@ -1,11 +1,20 @@
 import os
-import json
+import sys
+import time
+import heapq
+import hashlib
+import asyncio
+import threading
+from functools import partial
+from io import BytesIO
 from pathlib import Path
 from typing import List, Optional, Dict, Any
 from datetime import datetime, date, timezone
 
+import orjson
+from cachetools import TTLCache
 from fastapi import FastAPI, HTTPException, Request
-from fastapi.responses import StreamingResponse, FileResponse
+from fastapi.responses import StreamingResponse, FileResponse, ORJSONResponse
 from fastapi.staticfiles import StaticFiles
 from fastapi.middleware.cors import CORSMiddleware
 from pydantic import BaseModel, Field
@@ -31,7 +40,7 @@ except Exception:
     genai = None
     GEMINI_MODEL_NAME = None
 
-app = FastAPI(title="Children Rehab Backend", version="0.1.0")
+app = FastAPI(title="Children Rehab Backend", version="0.1.0", default_response_class=ORJSONResponse)
 
 # CORS for local files and localhost origins
 app.add_middleware(
@@ -53,40 +62,246 @@ app.add_middleware(
 # Data storage directory
 DATA_DIR = Path(__file__).resolve().parent / 'data'
 DATA_DIR.mkdir(parents=True, exist_ok=True)
-ASSESSMENTS_FILE = DATA_DIR / 'assessments.json'
-WORKOUTS_FILE = DATA_DIR / 'workouts.json'
+ASSESSMENTS_FILE = DATA_DIR / 'assessments.jsonl'
+WORKOUTS_FILE = DATA_DIR / 'workouts.jsonl'
 PATIENTS_FILE = DATA_DIR / 'patients.json'
 
-# Ensure files exist
-for f in [ASSESSMENTS_FILE, WORKOUTS_FILE, PATIENTS_FILE]:
-    if not f.exists():
-        f.write_text(json.dumps([], indent=2))
+# Parsed file contents keyed by path, reused until the file's version changes.
+# Entries are (version, rows, rows grouped by str(patientId)); see _file_version.
+_FILE_CACHE: Dict[Path, tuple[tuple[int, int, int], List[Dict[str, Any]], Dict[str, List[Dict[str, Any]]]]] = {}
+# Serializes appends (and their cache updates) within this process
+_APPEND_LOCK = threading.Lock()
+
+
+def _read_jsonl(path: Path) -> List[Dict[str, Any]]:
+    items: List[Dict[str, Any]] = []
+    with path.open('rb') as fh:
+        for line in fh:
+            line = line.strip()
+            if not line:
+                continue
+            try:
+                items.append(orjson.loads(line))
+            except orjson.JSONDecodeError:
+                # Skip a torn/partial line rather than losing the whole file
+                continue
+    return items
 
 
-def _read_json(path: Path) -> List[Dict[str, Any]]:
+def _index_by_patient(rows: List[Dict[str, Any]]) -> Dict[str, List[Dict[str, Any]]]:
+    index: Dict[str, List[Dict[str, Any]]] = {}
+    for r in rows:
+        index.setdefault(str(r.get('patientId')), []).append(r)
+    return index
+
+
+def _file_version(st: os.stat_result) -> tuple[int, int, int]:
+    # mtime alone isn't enough: on coarse-timestamp filesystems another worker's
+    # append can land in the same tick, but it always grows the size
+    return (st.st_mtime_ns, st.st_size, st.st_ino)
+
+
+def _load_cached(path: Path) -> tuple[tuple[int, int, int], List[Dict[str, Any]], Dict[str, List[Dict[str, Any]]]]:
+    """Return the (version, rows, by_patient) cache entry for path, re-parsing only if the file changed."""
     try:
-        return json.loads(path.read_text() or "[]")
+        version = _file_version(path.stat())
+        cached = _FILE_CACHE.get(path)
+        if cached is not None and cached[0] == version:
+            return cached
+        if path.suffix == '.jsonl':
+            items = _read_jsonl(path)
+        else:
+            items = orjson.loads(path.read_bytes() or b"[]")
+        entry = (version, items, _index_by_patient(items))
+        _FILE_CACHE[path] = entry
+        return entry
     except Exception:
-        return []
+        return ((-1, -1, -1), [], {})
+
+
+def _read_json_versioned(path: Path, patientId: Optional[str] = None) -> tuple[tuple[int, int, int], List[Dict[str, Any]]]:
+    # Returns the file's version together with a shallow copy of the cached rows;
+    # callers must copy records before mutating them.
+    # With patientId, only that patient's rows are returned, via the per-patient index.
+    version, items, by_patient = _load_cached(path)
+    if patientId:
+        return version, list(by_patient.get(str(patientId), ()))
+    return version, list(items)
+
+
+def _read_json(path: Path, patientId: Optional[str] = None) -> List[Dict[str, Any]]:
+    return _read_json_versioned(path, patientId)[1]
 
 
 def _write_json(path: Path, data: List[Dict[str, Any]]):
-    path.write_text(json.dumps(data, indent=2))
+    if path.suffix == '.jsonl':
+        path.write_bytes(b"".join(orjson.dumps(r) + b"\n" for r in data))
+    else:
+        path.write_bytes(orjson.dumps(data, option=orjson.OPT_INDENT_2))
+    items = list(data)
+    _FILE_CACHE[path] = (_file_version(path.stat()), items, _index_by_patient(items))
 
 
-def _read_patients_as_map() -> Dict[str, Dict[str, Any]]:
-    items: List[Dict[str, Any]] = _read_json(PATIENTS_FILE)
+def _append_jsonl(path: Path, rec: Dict[str, Any]):
+    """Append one record to a JSON Lines file without rewriting it."""
+    line = orjson.dumps(rec) + b"\n"
+    with _APPEND_LOCK:
+        fd = os.open(path, os.O_WRONLY | os.O_APPEND | os.O_CREAT, 0o644)
+        try:
+            before = os.fstat(fd)
+            os.write(fd, line)
+            after = os.fstat(fd)
+        finally:
+            os.close(fd)
+        cached = _FILE_CACHE.get(path)
+        # Extend the cached rows only if no other writer touched the file in between; compare
+        # the whole version, since a foreign append in the same mtime tick still grows the size
+        if cached is not None and cached[0] == _file_version(before) and after.st_size == before.st_size + len(line):
+            _, items, by_patient = cached
+            items.append(rec)
+            by_patient.setdefault(str(rec.get('patientId')), []).append(rec)
+            _FILE_CACHE[path] = (_file_version(after), items, by_patient)
+        else:
+            _FILE_CACHE.pop(path, None)
+
+
+def _append_json(path: Path, rec: Dict[str, Any]):
+    """Append one record to a JSON array file (read-modify-write under the append lock)."""
+    with _APPEND_LOCK:
+        items = _read_json(path)
+        items.append(rec)
+        _write_json(path, items)
+
+
+def _replace_json(path: Path, data: List[Dict[str, Any]]):
+    """Overwrite a data file under the append lock, so it can't interleave with an append."""
+    with _APPEND_LOCK:
+        _write_json(path, data)
+
+
+# Async wrappers: run blocking file I/O in the default threadpool, off the event loop
+async def _aread_json(path: Path, patientId: Optional[str] = None) -> List[Dict[str, Any]]:
+    return await asyncio.to_thread(_read_json, path, patientId)
+
+
+async def _aread_json_versioned(path: Path, patientId: Optional[str] = None) -> tuple[tuple[int, int, int], List[Dict[str, Any]]]:
+    return await asyncio.to_thread(_read_json_versioned, path, patientId)
+
+
+async def _awrite_json(path: Path, data: List[Dict[str, Any]]):
+    await asyncio.to_thread(_replace_json, path, data)
+
+
+async def _aappend_jsonl(path: Path, rec: Dict[str, Any]):
+    await asyncio.to_thread(_append_jsonl, path, rec)
+
+
+def _create_exclusive(path: Path, payload: bytes) -> bool:
+    """Create path with payload only if it doesn't exist yet; False if another process won."""
+    try:
+        fd = os.open(path, os.O_WRONLY | os.O_CREAT | os.O_EXCL, 0o644)
+    except FileExistsError:
+        return False
+    with os.fdopen(fd, 'wb') as fh:
+        fh.write(payload)
+    return True
+
+
+def _publish_new(path: Path, payload: bytes) -> bool:
+    """Publish a fully written file at path unless it already exists; False if it does."""
+    tmp = path.with_name(f"{path.name}.{os.getpid()}.tmp")
+    try:
+        tmp.write_bytes(payload)
+        # link() refuses to overwrite, so readers never see a half-written file
+        os.link(tmp, path)
+        return True
+    except FileExistsError:
+        return False
+    except OSError:
+        # Filesystem without hard links: fall back to an exclusive create
+        return _create_exclusive(path, payload)
+    finally:
+        tmp.unlink(missing_ok=True)
+
+
+def _migrate_legacy_json(legacy: Path, target: Path):
+    """Move a legacy JSON array store into its JSON Lines file.
+
+    Runs at import in every worker (gunicorn starts several without --preload). The legacy
+    file is claimed with an atomic rename so exactly one worker migrates it, and its rows are
+    merged into an existing target (e.g. the shipped sample data) rather than skipped.
+    """
+    claimed = legacy.with_name(f"{legacy.name}.{os.getpid()}.migrating")
+    try:
+        legacy.rename(claimed)
+    except FileNotFoundError:
+        # Nothing to migrate, or another worker claimed it
+        return
+    try:
+        rows = orjson.loads(claimed.read_bytes() or b"[]")
+    except orjson.JSONDecodeError:
+        claimed.rename(legacy)
+        print(f"warning: {legacy} is not valid JSON; left in place and not migrated", file=sys.stderr)
+        return
+    if not _publish_new(target, b"".join(orjson.dumps(r) + b"\n" for r in rows)):
+        # Target already exists: append only the legacy rows it doesn't have yet
+        known = {r.get('id') for r in _read_jsonl(target) if r.get('id')}
+        missing = [r for r in rows if not r.get('id') or r.get('id') not in known]
+        if missing:
+            fd = os.open(target, os.O_WRONLY | os.O_APPEND)
+            try:
+                os.write(fd, b"".join(orjson.dumps(r) + b"\n" for r in missing))
+            finally:
+                os.close(fd)
+    os.replace(claimed, legacy.with_suffix('.json.bak'))
+
+
+# One-time migration of legacy JSON array stores to JSON Lines
+for legacy, target in [(DATA_DIR / 'assessments.json', ASSESSMENTS_FILE), (DATA_DIR / 'workouts.json', WORKOUTS_FILE)]:
+    _migrate_legacy_json(legacy, target)
+
+# Ensure files exist (exclusively, so a booting worker never truncates one another is using)
+for f in [ASSESSMENTS_FILE, WORKOUTS_FILE, PATIENTS_FILE]:
+    _create_exclusive(f, b"" if f.suffix == '.jsonl' else orjson.dumps([], option=orjson.OPT_INDENT_2))
+
+
+# Patients indexed by id, rebuilt only when patients.json changes
+_PATIENTS_MAP_CACHE: Optional[tuple[tuple[int, int, int], Dict[str, Dict[str, Any]]]] = None
+
+
+def _read_patients_as_map_versioned() -> tuple[tuple[int, int, int], Dict[str, Dict[str, Any]]]:
+    # The returned map is shared across requests; treat it as read-only
+    global _PATIENTS_MAP_CACHE
+    version, items, _ = _load_cached(PATIENTS_FILE)
+    cached = _PATIENTS_MAP_CACHE
+    if cached is not None and cached[0] == version:
+        return cached
     result: Dict[str, Dict[str, Any]] = {}
-    for p in items:
+    for i, p in enumerate(items):
         if not p.get('id'):
-            p['id'] = str(len(result) + 1)
+            # Copy before filling in a positional id: the cached rows are written back
+            # to patients.json by _append_json and must not pick it up
+            p = dict(p, id=str(i + 1))
         result[str(p['id'])] = p
-    return result
+    _PATIENTS_MAP_CACHE = (version, result)
+    return _PATIENTS_MAP_CACHE
+
+
+def _read_patients_as_map() -> Dict[str, Dict[str, Any]]:
+    return _read_patients_as_map_versioned()[1]
+
+
+async def _aread_patients_as_map() -> Dict[str, Dict[str, Any]]:
+    return await asyncio.to_thread(_read_patients_as_map)
+
+
+async def _aread_patients_as_map_versioned() -> tuple[tuple[int, int, int], Dict[str, Dict[str, Any]]]:
+    return await asyncio.to_thread(_read_patients_as_map_versioned)
 
 
 @app.get("/api/patients")
 async def get_patients():
-    return list(_read_patients_as_map().values())
+    return ORJSONResponse(list((await _aread_patients_as_map()).values()))
 
 
 class NewPatient(BaseModel):
@@ -96,11 +311,9 @@ class NewPatient(BaseModel):
 
 @app.post("/api/patients")
 async def create_patient(p: NewPatient):
-    items: List[Dict[str, Any]] = _read_json(PATIENTS_FILE)
-    new_id = str(int(datetime.now().timestamp()*1000))
+    new_id = str(_now_ms())
     rec = {"id": new_id, "name": p.name.strip(), "age": p.age}
-    items.append(rec)
-    _write_json(PATIENTS_FILE, items)
+    await asyncio.to_thread(_append_json, PATIENTS_FILE, rec)
     return rec
 
 
@@ -108,23 +321,28 @@ async def create_patient(p: NewPatient):
 @app.post("/api/admin/clear")
 async def admin_clear(type: Optional[str] = "all"):
     if type in ("assessments", "all"):
-        _write_json(ASSESSMENTS_FILE, [])
+        await _awrite_json(ASSESSMENTS_FILE, [])
     if type in ("workouts", "all"):
-        _write_json(WORKOUTS_FILE, [])
+        await _awrite_json(WORKOUTS_FILE, [])
     if type in ("patients", "all"):
-        _write_json(PATIENTS_FILE, [])
+        await _awrite_json(PATIENTS_FILE, [])
     return {"status": "cleared", "type": type}
 
 
+def _now_ms() -> int:
+    """Current Unix time in milliseconds, used for record ids."""
+    return time.time_ns() // 1_000_000
+
+
 class Assessment(BaseModel):
-    id: str = Field(default_factory=lambda: f"ASSESS_{int(datetime.now(timezone.utc).timestamp()*1000)}")
+    id: str = Field(default_factory=lambda: f"ASSESS_{_now_ms()}")
     patientId: str
     timestamp: datetime = Field(default_factory=lambda: datetime.now(timezone.utc))
     data: Dict[str, Any] = Field(default_factory=dict)
 
 
 class Workout(BaseModel):
-    id: str = Field(default_factory=lambda: f"WORK_{int(datetime.now(timezone.utc).timestamp()*1000)}")
+    id: str = Field(default_factory=lambda: f"WORK_{_now_ms()}")
     patientId: str
     activityName: str
     category: str
@@ -144,42 +362,91 @@ class ReportRequest(BaseModel):
 
 # Utility computations
 
-def compute_assessment_score(assessment: Assessment) -> int:
+# Dashboard skills chart: category label -> assessment fields averaged into it
+_SKILL_CATEGORIES: Dict[str, tuple[str, ...]] = {
+    'Fine Motor': ('fineMotor_grip', 'fineMotor_beads'),
+    'Gross Motor': ('grossMotor_balance', 'grossMotor_time', 'grossMotor_falls'),
+    'Cognitive': ('cognitive_approach', 'cognitive_memory'),
+    'Sensory': ('sensory_behavior',),
+    'Communication': ('communication_clarity', 'communication_grammar'),
+    'Social': ('social_interaction',),
+    'ADL': ('adl_independence',),
+    'Attention': ('attention_span',),
+}
+_SKILL_LABELS = tuple(_SKILL_CATEGORIES)
+# Flattened (field, category index) pairs so one pass over an assessment covers every category
+_SKILL_KEY_INDEX = tuple((k, i) for i, keys in enumerate(_SKILL_CATEGORIES.values()) for k in keys)
+
+# Range inputs (1-5) that make up the overall assessment score
+_SCORE_KEYS = (
+    'fineMotor_grip', 'grossMotor_balance', 'cognitive_approach',
+    'emotional_quality', 'communication_clarity', 'communication_grammar'
+)
+
+_WEEKDAY_LABELS = ('Mon', 'Tue', 'Wed', 'Thu', 'Fri', 'Sat', 'Sun')
+# Home workout categories (as stored) and their chart labels, in display order
+_ACTIVITY_CATEGORIES = ('fine-motor', 'gross-motor', 'cognitive', 'sensory', 'communication', 'social', 'adl', 'attention')
+_ACTIVITY_LABELS = ('Fine Motor', 'Gross Motor', 'Cognitive', 'Sensory', 'Communication', 'Social', 'ADL', 'Attention')
+_ACTIVITY_CATEGORY_IDX = {c: i for i, c in enumerate(_ACTIVITY_CATEGORIES)}
+
+def compute_assessment_score_raw(data: Dict[str, Any]) -> int:
     # Basic scoring from range inputs if present (1-5 scaled to percentage)
-    keys = [
-        'fineMotor_grip', 'grossMotor_balance', 'cognitive_approach',
-        'emotional_quality', 'communication_clarity', 'communication_grammar'
-    ]
-    values = []
-    for k in keys:
-        v = assessment.data.get(k)
-        try:
-            if v is not None:
-                values.append(int(v))
-        except Exception:
+    total = 0
+    count = 0
+    for k in _SCORE_KEYS:
+        v = data.get(k)
+        # Fast path for what the forms actually store: ints or digit strings
+        if isinstance(v, int) or (isinstance(v, str) and v.isdecimal()):
+            total += int(v)
+        elif v is None or v == '':
             continue
-    if not values:
+        else:
+            try:
+                total += int(v)
+            except Exception:
+                continue
+        count += 1
+    if not count:
         return 0
-    return round(sum(values) / (len(values) * 5) * 100)
+    return round(total / (count * 5) * 100)
+
+
+def compute_assessment_score(assessment: Assessment) -> int:
+    return compute_assessment_score_raw(assessment.data)
+
+
+_now_utc = partial(datetime.now, timezone.utc)
+
+if sys.version_info >= (3, 11):
+    # fromisoformat accepts the 'Z' suffix natively from 3.11 on
+    _fromisoformat = datetime.fromisoformat
+else:
+    def _fromisoformat(value: str) -> datetime:
+        return datetime.fromisoformat(value.replace('Z', '+00:00'))
 
 
 def parse_iso_ts(value: Optional[str]) -> datetime:
     """Parse ISO 8601 timestamps, including 'Z' suffix. Fallback to UTC now."""
     if not value:
-        return datetime.now(timezone.utc)
+        return _now_utc()
     try:
-        v = value.replace('Z', '+00:00')
-        return datetime.fromisoformat(v)
+        return _fromisoformat(value)
     except Exception:
-        return datetime.now(timezone.utc)
+        return _now_utc()
+
 
+# The *_raw helpers work on the dicts read from disk; building Pydantic models
+# just to read a few fields dominated the cost of the stats/chart endpoints.
 
-def compute_dashboard_stats(assessments: List[Assessment], workouts: List[Workout]) -> Dict[str, Any]:
-    patients = {a.patientId for a in assessments} | {w.patientId for w in workouts}
-    today_str = datetime.now(timezone.utc).date().isoformat()
-    todays_assessments = [a for a in assessments if a.timestamp.date().isoformat() == today_str]
-    avg_progress_list = [compute_assessment_score(a) for a in assessments if compute_assessment_score(a) > 0]
-    avg_progress = round(sum(avg_progress_list) / len(avg_progress_list)) if avg_progress_list else 0
+def compute_dashboard_stats_raw(assessments: List[Dict[str, Any]], workouts: List[Dict[str, Any]],
+                                scores: Optional[List[int]] = None) -> Dict[str, Any]:
+    patients = {str(a.get('patientId')) for a in assessments} | {str(w.get('patientId')) for w in workouts}
+    today = datetime.now(timezone.utc).date()
+    todays_assessments = [a for a in assessments if parse_iso_ts(a.get('timestamp')).date() == today]
+    if scores is None:
+        scores = [compute_assessment_score_raw(a.get('data') or {}) for a in assessments]
+    positives = [s for s in scores if s > 0]
+    avg_progress = round(sum(positives) / len(positives)) if positives else 0
     return {
         'activePatients': len(patients),
         'todaysAssessments': len(todays_assessments),
@@ -188,26 +455,39 @@ def compute_dashboard_stats(assessments: List[Assessment], workouts: List[Workou
     }
 
 
-def compute_weekly_activity(workouts: List[Workout]) -> Dict[str, Any]:
+def compute_weekly_activity_raw(workouts: List[Dict[str, Any]]) -> Dict[str, Any]:
     # Return counts for last 7 days (Mon..Sun as labels)
-    labels = ['Mon', 'Tue', 'Wed', 'Thu', 'Fri', 'Sat', 'Sun']
-    counts = {i: 0 for i in range(7)}
+    data = [0] * 7
     for w in workouts:
-        counts[w.timestamp.weekday()] = counts.get(w.timestamp.weekday(), 0) + 1
-    data = [counts[i] for i in range(7)]
-    return {'labels': labels, 'data': data}
+        data[parse_iso_ts(w.get('timestamp')).weekday()] += 1
+    return {'labels': list(_WEEKDAY_LABELS), 'data': data}
 
 
-def compute_activity_distribution(workouts: List[Workout]) -> Dict[str, Any]:
-    categories = ['fine-motor', 'gross-motor', 'cognitive', 'sensory', 'communication', 'social', 'adl', 'attention']
-    counts = {c: 0 for c in categories}
+def compute_activity_distribution_raw(workouts: List[Dict[str, Any]]) -> Dict[str, Any]:
+    data = [0] * len(_ACTIVITY_CATEGORIES)
     for w in workouts:
-        c = (w.category or '').lower()
-        if c in counts:
-            counts[c] += 1
-    labels = ['Fine Motor', 'Gross Motor', 'Cognitive', 'Sensory', 'Communication', 'Social', 'ADL', 'Attention']
-    data = [counts['fine-motor'], counts['gross-motor'], counts['cognitive'], counts['sensory'], counts['communication'], counts['social'], counts['adl'], counts['attention']]
-    return {'labels': labels, 'data': data}
+        i = _ACTIVITY_CATEGORY_IDX.get((w.get('category') or '').lower())
+        if i is not None:
+            data[i] += 1
+    return {'labels': list(_ACTIVITY_LABELS), 'data': data}
+
+
+def _add_skill_values(data: Dict[str, Any], sums: List[int], cnts: List[int]):
+    # Accumulate every skill field of one assessment into its category bucket
+    for k, idx in _SKILL_KEY_INDEX:
+        v = data.get(k)
+        if v is None:
+            continue
+        try:
+            sums[idx] += int(v)
+            cnts[idx] += 1
+        except Exception:
+            continue
+
+
+def _skill_percentages(sums: List[int], cnts: List[int]) -> Dict[str, Any]:
+    data = [round(total / (cnt * 5) * 100) if cnt else 0 for total, cnt in zip(sums, cnts)]
+    return {'labels': list(_SKILL_LABELS), 'data': data}
 
 
 # Routes
@@ -232,171 +512,119 @@ async def create_assessment(payload: Dict[str, Any]):
         timestamp=parse_iso_ts(payload.get('timestamp')),
         data={k: v for k, v in payload.items() if k not in ['patientId', 'timestamp']}
     )
-    # Read raw JSON list, append serialized assessment, and write back
-    items_raw = _read_json(ASSESSMENTS_FILE)
-    items_raw.append(json.loads(assessment.model_dump_json()))
-    _write_json(ASSESSMENTS_FILE, items_raw)
+    # Append the serialized assessment as one JSON line
+    await _aappend_jsonl(ASSESSMENTS_FILE, assessment.model_dump(mode='json'))
     return {"message": "Assessment saved successfully", "id": assessment.id, "score": compute_assessment_score(assessment)}
 
 
 @app.get("/api/assessments")
 async def list_assessments(patientId: Optional[str] = None, limit: Optional[int] = None):
-    items = _read_json(ASSESSMENTS_FILE)
-    if patientId:
-        items = [a for a in items if str(a.get('patientId')) == str(patientId)]
+    items, patients_map = await asyncio.gather(_aread_json(ASSESSMENTS_FILE, patientId), _aread_patients_as_map())
+    if limit and limit > 0:
+        # Newest `limit` rows without sorting the whole list; same order as sorted(..., reverse=True)[:limit]
+        items = heapq.nlargest(limit, items, key=lambda x: x.get('timestamp', ''))
+    elif limit:
+        # A negative limit keeps the slice semantics: everything but the oldest -limit rows
+        items = sorted(items, key=lambda x: x.get('timestamp', ''), reverse=True)[:limit]
     # Normalize timestamp to ISO
-    patients_map = _read_patients_as_map()
+    # Copy records before enriching so the cached file contents stay untouched
+    items = [dict(a) for a in items]
     for a in items:
-        if isinstance(a.get('timestamp'), str):
+        ts = a.get('timestamp')
+        if isinstance(ts, str):
             try:
                 # ensure ISO
-                datetime.fromisoformat(a['timestamp'].replace('Z', '+00:00'))
+                _fromisoformat(ts)
             except Exception:
-                a['timestamp'] = datetime.now(timezone.utc).isoformat()
+                a['timestamp'] = _now_utc().isoformat()
         # enrich with patient info
-        pid = str(a.get('patientId')) if a.get('patientId') is not None else ''
+        pid_raw = a.get('patientId')
+        pid = str(pid_raw) if pid_raw is not None else ''
         p = patients_map.get(pid)
         if p:
             a['patientName'] = p['name']
             a['patientAge'] = p['age']
-    if limit:
-        items = sorted(items, key=lambda x: x.get('timestamp', ''), reverse=True)[:limit]
-    return items
+    return ORJSONResponse(items)
 
 
 # Workouts
 @app.post("/api/workouts")
 async def create_workout(workout: Workout):
-    items = _read_json(WORKOUTS_FILE)
-    items.append(json.loads(workout.model_dump_json()))
-    _write_json(WORKOUTS_FILE, items)
+    await _aappend_jsonl(WORKOUTS_FILE, workout.model_dump(mode='json'))
     return {"message": "Workout saved successfully", "id": workout.id}
 
 
 @app.get("/api/workouts")
 async def list_workouts(patientId: Optional[str] = None):
-    items = _read_json(WORKOUTS_FILE)
-    if patientId:
-        items = [w for w in items if str(w.get('patientId')) == str(patientId)]
-    return items
+    items = await _aread_json(WORKOUTS_FILE, patientId)
+    return ORJSONResponse(items)
 
 
 # Dashboard stats and charts
 @app.get("/api/stats/dashboard")
 async def dashboard_stats(patientId: Optional[str] = None):
-    assessments = [Assessment(**a) if 'data' in a else Assessment(patientId=a.get('patientId'), timestamp=datetime.fromisoformat(a.get('timestamp')) if a.get('timestamp') else datetime.utcnow(), data=a.get('data', {}), id=a.get('id', f"ASSESS_{int(datetime.now().timestamp()*1000)}")) for a in _read_json(ASSESSMENTS_FILE)]
-    workouts = [Workout(**w) for w in _read_json(WORKOUTS_FILE)]
-    if patientId:
-        assessments = [a for a in assessments if str(a.patientId) == str(patientId)]
-        workouts = [w for w in workouts if str(w.patientId) == str(patientId)]
-    return compute_dashboard_stats(assessments, workouts)
+    assessments_raw, workouts_raw = await asyncio.gather(
+        _aread_json(ASSESSMENTS_FILE, patientId), _aread_json(WORKOUTS_FILE, patientId)
+    )
+    return ORJSONResponse(compute_dashboard_stats_raw(assessments_raw, workouts_raw))
 
 
 @app.get("/api/charts/homeworkout/weekly")
 async def chart_homeworkout_weekly(patientId: Optional[str] = None):
-    workouts = [Workout(**w) for w in _read_json(WORKOUTS_FILE)]
-    if patientId:
-        workouts = [w for w in workouts if str(w.patientId) == str(patientId)]
-    return compute_weekly_activity(workouts)
+    workouts = await _aread_json(WORKOUTS_FILE, patientId)
+    return ORJSONResponse(compute_weekly_activity_raw(workouts))
 
 
 @app.get("/api/charts/homeworkout/distribution")
 async def chart_homeworkout_distribution(patientId: Optional[str] = None):
-    workouts = [Workout(**w) for w in _read_json(WORKOUTS_FILE)]
-    if patientId:
-        workouts = [w for w in workouts if str(w.patientId) == str(patientId)]
-    return compute_activity_distribution(workouts)
+    workouts = await _aread_json(WORKOUTS_FILE, patientId)
+    return ORJSONResponse(compute_activity_distribution_raw(workouts))
 
 
 @app.get("/api/charts/dashboard/progress")
 async def chart_dashboard_progress(patientId: Optional[str] = None, days: Optional[int] = 7):
     """Return average assessment score for each of the last N days (default 7)."""
-    raw = _read_json(ASSESSMENTS_FILE)
-    if patientId:
-        raw = [a for a in raw if str(a.get('patientId')) == str(patientId)]
-    assessments = [
-        Assessment(
-            patientId=a.get('patientId'),
-            timestamp=parse_iso_ts(a.get('timestamp')),
-            data=a.get('data', {}),
-            id=a.get('id', f"ASSESS_{int(datetime.now(timezone.utc).timestamp()*1000)}")
-        ) for a in raw
-    ]
+    raw = await _aread_json(ASSESSMENTS_FILE, patientId)
     # Build date buckets for last N days
     try:
         n = max(1, min(int(days or 7), 90))
     except Exception:
         n = 7
     today = datetime.now(timezone.utc).date()
-    dates = [(today, today.isoformat())]
+    dates = [today]
     for i in range(1, n):
-        d = today.fromordinal(today.toordinal() - i)
-        dates.append((d, d.isoformat()))
+        dates.append(today.fromordinal(today.toordinal() - i))
     dates.reverse()
-    buckets: Dict[str, list[int]] = {iso: [] for _, iso in dates}
-    for a in assessments:
-        iso = a.timestamp.date().isoformat()
-        if iso in buckets:
-            buckets[iso].append(compute_assessment_score(a))
-    labels = [d.strftime('%b %d') for d, _ in dates]
-    data = [round(sum(vals)/len(vals)) if vals else 0 for _, iso in dates for vals in [buckets[iso]]]
-    return {'labels': labels, 'data': data}
+    bucket_idx = {d: i for i, d in enumerate(dates)}
+    sums = [0] * n
+    cnts = [0] * n
+    for a in raw:
+        i = bucket_idx.get(parse_iso_ts(a.get('timestamp')).date())
+        if i is not None:
+            sums[i] += compute_assessment_score_raw(a.get('data') or {})
+            cnts[i] += 1
+    labels = [d.strftime('%b %d') for d in dates]
+    data = [round(total / cnt) if cnt else 0 for total, cnt in zip(sums, cnts)]
+    return ORJSONResponse({'labels': labels, 'data': data})
 
 
 @app.get("/api/charts/dashboard/skills")
 async def chart_dashboard_skills(patientId: Optional[str] = None):
     # Aggregate assessment fields into categories and average to percentages
-    raw = _read_json(ASSESSMENTS_FILE)
-    if patientId:
-        raw = [a for a in raw if str(a.get('patientId')) == str(patientId)]
-    assessments = [
-        Assessment(
-            patientId=a.get('patientId'),
-            timestamp=parse_iso_ts(a.get('timestamp')),
-            data=a.get('data', {}),
-            id=a.get('id', f"ASSESS_{int(datetime.now(timezone.utc).timestamp()*1000)}")
-        ) for a in raw
-    ]
-
-    categories: Dict[str, list] = {
-        'Fine Motor': ['fineMotor_grip', 'fineMotor_beads'],
-        'Gross Motor': ['grossMotor_balance', 'grossMotor_time', 'grossMotor_falls'],
-        'Cognitive': ['cognitive_approach', 'cognitive_memory'],
-        'Sensory': ['sensory_behavior'],
-        'Communication': ['communication_clarity', 'communication_grammar'],
-        'Social': ['social_interaction'],
-        'ADL': ['adl_independence'],
-        'Attention': ['attention_span']
-    }
-
-    labels = list(categories.keys())
-    data: list[int] = []
-    for label in labels:
-        keys = categories[label]
-        vals: list[int] = []
-        for a in assessments:
-            for k in keys:
-                v = a.data.get(k)
-                try:
-                    if v is not None:
-                        vals.append(int(v))
-                except Exception:
-                    continue
-        if vals:
-            pct = round(sum(vals) / (len(vals) * 5) * 100)
-        else:
-            pct = 0
-        data.append(pct)
-
-    return { 'labels': labels, 'data': data }
+    raw = await _aread_json(ASSESSMENTS_FILE, patientId)
+    # Single pass: accumulate every skill field into its category bucket
+    sums = [0] * len(_SKILL_LABELS)
+    cnts = [0] * len(_SKILL_LABELS)
+    for a in raw:
+        _add_skill_values(a.get('data') or {}, sums, cnts)
+    return ORJSONResponse(_skill_percentages(sums, cnts))
 
 
 # Reports data
 @app.get("/api/reports/skill-performance")
 async def reports_skill_performance(patientId: Optional[str] = None):
-    assessments = [Assessment(**a) if 'data' in a else Assessment(patientId=a.get('patientId'), timestamp=datetime.fromisoformat(a.get('timestamp')) if a.get('timestamp') else datetime.utcnow(), data=a.get('data', {}), id=a.get('id', f"ASSESS_{int(datetime.now().timestamp()*1000)}")) for a in _read_json(ASSESSMENTS_FILE)]
-    if patientId:
-        assessments = [a for a in assessments if str(a.patientId) == str(patientId)]
+    fallback_ms = _now_ms()
+    assessments = [Assessment(**a) if 'data' in a else Assessment(patientId=a.get('patientId'), timestamp=datetime.fromisoformat(a.get('timestamp')) if a.get('timestamp') else datetime.utcnow(), data=a.get('data', {}), id=a.get('id') or f"ASSESS_{fallback_ms}") for a in await _aread_json(ASSESSMENTS_FILE, patientId)]
     # Aggregate by category using available range fields
     categories = {
         'Fine Motor Skills': ['fineMotor_grip'],
@@ -430,24 +658,23 @@ async def reports_skill_performance(patientId: Optional[str] = None):
             'goal': goal,
             'status': status
         })
-    return results
+    return ORJSONResponse(results)
 
 
 @app.get("/api/reports/session-history")
 async def reports_session_history(patientId: Optional[str] = None):
-    assessments = _read_json(ASSESSMENTS_FILE)
+    assessments, patients_map = await asyncio.gather(_aread_json(ASSESSMENTS_FILE, patientId), _aread_patients_as_map())
     items = []
-    patients_map = _read_patients_as_map()
     for a in assessments:
-        if patientId and str(a.get('patientId')) != str(patientId):
-            continue
         ts = a.get('timestamp')
         try:
             d = parse_iso_ts(ts).date().isoformat()
         except Exception:
             d = datetime.now(timezone.utc).date().isoformat()
-        pid = str(a.get('patientId')) if a.get('patientId') is not None else ''
+        pid_raw = a.get('patientId')
+        pid = str(pid_raw) if pid_raw is not None else ''
         p = patients_map.get(pid, {})
+        data = a.get('data') or {}
         items.append({
             'date': d,
             'patient': p.get('name') or a.get('patientId', 'Unknown'),
@@ -455,17 +682,32 @@ async def reports_session_history(patientId: Optional[str] = None):
             'age': p.get('age'),
             'duration': 45,  # placeholder duration
             'activities': 'Assessment Session',
-            'score': compute_assessment_score(Assessment(patientId=a.get('patientId'), timestamp=datetime.now(timezone.utc), data=a.get('data', {}))),
-            'notes': a.get('data', {}).get('fineMotor_notes', '')[:60]
+            'score': compute_assessment_score_raw(data),
+            'notes': (data.get('fineMotor_notes') or '')[:60]
         })
     # Sort by date desc
     items.sort(key=lambda x: x['date'], reverse=True)
-    return items
+    return ORJSONResponse(items)
 
 
 # AI Report Generation
-def _build_pdf_bytes(title: str, content: str) -> bytes:
-    """Generate a simple PDF from plain text using reportlab."""
+
+# Recently generated Gemini content, so refreshes and tab switches don't regenerate it
+_REPORT_CACHE: TTLCache = TTLCache(maxsize=256, ttl=600)
+
+
+def _report_cache_key(req: ReportRequest, versions: List[tuple[int, int, int]]) -> bytes:
+    """Key on the report parameters plus the versions of the data the report was built from."""
+    # The output format only affects rendering, not the generated text
+    params = req.model_dump(mode='json', exclude={'format'})
+    return hashlib.blake2b(orjson.dumps([params, versions])).digest()
+
+# Line prefixes recognised by the PDF builder (matched on the stripped line)
+_LINE_PREFIXES = {'# ': 'h1', '## ': 'h2', '* ': 'bullet', '- ': 'bullet'}
+
+
+def _build_pdf_stream(title: str, content: str) -> BytesIO:
+    """Generate a simple PDF from plain text using reportlab, returned as a rewound buffer."""
     try:
         from reportlab.lib.pagesizes import A4
         from reportlab.lib.styles import getSampleStyleSheet
@@ -474,9 +716,8 @@ def _build_pdf_bytes(title: str, content: str) -> bytes:
         from reportlab.lib import colors
     except Exception as e:
         # If reportlab missing, return bytes of text for graceful fallback
-        return (title + "\n\n" + content).encode("utf-8")
+        return BytesIO((title + "\n\n" + content).encode("utf-8"))
 
-    from io import BytesIO
     buffer = BytesIO()
     doc = SimpleDocTemplate(buffer, pagesize=A4, title=title, 
                           leftMargin=0.75*inch, rightMargin=0.75*inch,
@@ -499,99 +740,90 @@ def _build_pdf_bytes(title: str, content: str) -> bytes:
     story.append(Paragraph(title, title_style))
     story.append(Spacer(1, 0.2*inch))
     
+    nested_style = bullet_style.clone('NestedBullet')
+    nested_style.leftIndent = 40
+
     # Process content with proper heading detection and formatting
     current_section = []
-    in_bullet_list = False
-    
-    for line in content.split('\n'):
-        line = line.strip()
+
+    for raw_line in content.split('\n'):
+        line = raw_line.strip()
         if not line:
             story.append(Spacer(1, 0.15*inch))
-            in_bullet_list = False
             continue
-            
+
+        indent = len(raw_line) - len(raw_line.lstrip())
+        kind = _LINE_PREFIXES.get(line[:3]) or _LINE_PREFIXES.get(line[:2])
+
         # Detect headings
-        if line.startswith('# '):
-            # Add any accumulated content before starting new section
-            if current_section:
-                story.extend(current_section)
-                current_section = []
-                
-            # Add main heading (H1)
-            story.append(Paragraph(line[2:], heading1_style))
-            story.append(Spacer(1, 0.15*inch))
-            in_bullet_list = False
-            
-        elif line.startswith('## '):
+        if kind == 'h1' or kind == 'h2':
             # Add any accumulated content before starting new section
             if current_section:
                 story.extend(current_section)
                 current_section = []
-                
-            # Add subheading (H2)
-            story.append(Paragraph(line[3:], heading2_style))
-            story.append(Spacer(1, 0.1*inch))
-            in_bullet_list = False
-            
-        elif line.startswith('* ') or line.startswith('- '):
-            # Bullet point
+
+            if kind == 'h1':
+                # Add main heading (H1)
+                story.append(Paragraph(line[2:], heading1_style))
+                story.append(Spacer(1, 0.15*inch))
+            else:
+                # Add subheading (H2)
+                story.append(Paragraph(line[3:], heading2_style))
+                story.append(Spacer(1, 0.1*inch))
+
+        elif kind == 'bullet':
             bullet_text = line[2:].replace('  ', '&nbsp;&nbsp;')
-            current_section.append(Paragraph(f"• {bullet_text}", bullet_style))
-            in_bullet_list = True
-            
-        elif line.startswith('  * ') or line.startswith('  - '):
-            # Nested bullet point
-            bullet_text = line[4:].replace('  ', '&nbsp;&nbsp;')
-            nested_style = bullet_style.clone('NestedBullet')
-            nested_style.leftIndent = 40
-            current_section.append(Paragraph(f"  ○ {bullet_text}", nested_style))
-            
-        elif in_bullet_list and (line.startswith('  ') or line.startswith('   ')):
-            # Continuation of bullet point
-            last_item = current_section[-1]
-            text = last_item.text + ' ' + line.strip().replace('  ', '&nbsp;&nbsp;')
-            current_section[-1] = Paragraph(text, bullet_style)
-            
+            if indent >= 2:
+                # Nested bullet point
+                current_section.append(Paragraph(f"  ○ {bullet_text}", nested_style))
+            else:
+                # Bullet point
+                current_section.append(Paragraph(f"• {bullet_text}", bullet_style))
+
         else:
-            # Regular paragraph
+            # Regular paragraph; indented lines after a bullet stay separate paragraphs
             current_section.append(Paragraph(line.replace('  ', '&nbsp;&nbsp;'), normal_style))
-            in_bullet_list = False
-    
+
     # Add any remaining content
     if current_section:
         story.extend(current_section)
-        
+
     doc.build(story)
-    pdf = buffer.getvalue()
-    buffer.close()
-    return pdf
+    buffer.seek(0)
+    return buffer
+
+
+def _iter_buffer(buffer: BytesIO, chunk_size: int = 64 * 1024):
+    """Yield a buffer in fixed-size chunks, closing it once fully sent."""
+    try:
+        while chunk := buffer.read(chunk_size):
+            yield chunk
+    finally:
+        buffer.close()
 
 
 @app.post("/api/reports/generate")
 async def generate_report(req: ReportRequest, request: Request):
-    assessments = [
-        Assessment(
-            patientId=a.get('patientId'),
-            timestamp=parse_iso_ts(a.get('timestamp')),
-            data=a.get('data', {}),
-            id=a.get('id', f"ASSESS_{int(datetime.now(timezone.utc).timestamp()*1000)}")
-        ) for a in _read_json(ASSESSMENTS_FILE)
-    ]
-    workouts = [Workout(**w) for w in _read_json(WORKOUTS_FILE)]
-
-    if req.patientId:
-        assessments = [a for a in assessments if str(a.patientId) == str(req.patientId)]
-        workouts = [w for w in workouts if str(w.patientId) == str(req.patientId)]
-
-    stats = compute_dashboard_stats(assessments, workouts)
-    patients_map = _read_patients_as_map()
+    # Keep the file version each read was served from; the report cache key is built from these
+    assessments_read, workouts_read, patients_read = await asyncio.gather(
+        _aread_json_versioned(ASSESSMENTS_FILE, req.patientId),
+        _aread_json_versioned(WORKOUTS_FILE, req.patientId),
+        _aread_patients_as_map_versioned(),
+    )
+    assessments_version, assessments_raw = assessments_read
+    workouts_version, workouts_raw = workouts_read
+    patients_version, patients_map = patients_read
+
+    # Score each assessment once; reused for stats, the empty-data check and the prompt preview
+    scores = [compute_assessment_score_raw(a.get('data') or {}) for a in assessments_raw]
+    stats = compute_dashboard_stats_raw(assessments_raw, workouts_raw, scores)
     patient_info = patients_map.get(str(req.patientId)) if req.patientId else None
 
     # Prepare content (Gemini or fallback)
     content = None
     # If no meaningful data, return a neutral guidance report
-    has_scores = any(compute_assessment_score(a) > 0 for a in assessments)
-    if (not has_scores) and (len(workouts) == 0):
+    has_scores = any(s > 0 for s in scores)
+    if (not has_scores) and (len(workouts_raw) == 0):
         pname = (patient_info or {}).get('name', 'the patient')
         page = (patient_info or {}).get('age')
         age_str = f" (Age {page})" if page is not None else ""
@@ -614,82 +846,106 @@ async def generate_report(req: ReportRequest, request: Request):
                 f"Total Workouts: {stats['homeWorkouts']}\n"
             )
     else:
-        # Compose prompt with aggregated data
-        def truncate(s: str, n: int = 2000) -> str:
-            return s if len(s) <= n else s[:n] + '...'
-
-        assessments_preview = [
-            {
-                'patientId': a.patientId,
-                'timestamp': a.timestamp.isoformat(),
-                'score': compute_assessment_score(a),
-                'highlights': {k: a.data.get(k) for k in list(a.data.keys())[:8]}
-            }
-            for a in assessments[-50:]  # limit
-        ]
-        workouts_preview = [
-            {
-                'patientId': w.patientId,
-                'activityName': w.activityName,
-                'category': w.category,
-                'duration': w.duration,
-                'timestamp': w.timestamp.isoformat()
-            }
-            for w in workouts[-100:]
-        ]
+        # Reuse recent output for identical inputs; keyed on the versions of the rows read above,
+        # so a write that lands after the reads can only cause a miss, never a stale hit
+        cache_key = _report_cache_key(req, [assessments_version, workouts_version, patients_version])
+        if content is None:
+            content = _REPORT_CACHE.get(cache_key)
 
-        system_instructions = (
-            """
-            You are an expert pediatric rehabilitation data analyst generating a professional report.
+        if content is None:
+            # Only the prompt sample needs models; validate just the rows that end up in it
+            fallback_ms = _now_ms()
+            assessments = [
+                Assessment(
+                    patientId=a.get('patientId'),
+                    timestamp=parse_iso_ts(a.get('timestamp')),
+                    data=a.get('data', {}),
+                    id=a.get('id') or f"ASSESS_{fallback_ms}"
+                ) for a in assessments_raw[-50:]
+            ]
+            workouts = [Workout(**w) for w in workouts_raw[-100:]]
+
+            # Compose prompt with aggregated data
+            def truncate(s: str, n: int = 2000) -> str:
+                return s if len(s) <= n else s[:n] + '...'
+
+            assessments_preview = [
+                {
+                    'patientId': a.patientId,
+                    'timestamp': a.timestamp.isoformat(),
+                    'score': score,
+                    'highlights': {k: a.data.get(k) for k in list(a.data.keys())[:8]}
+                }
+                for a, score in zip(assessments, scores[-50:])
+            ]
+            workouts_preview = [
+                {
+                    'patientId': w.patientId,
+                    'activityName': w.activityName,
+                    'category': w.category,
+                    'duration': w.duration,
+                    'timestamp': w.timestamp.isoformat()
+                }
+                for w in workouts
+            ]
+
+            system_instructions = (
+                """
+                You are an expert pediatric rehabilitation data analyst generating a professional report.
             
-            FORMAT REQUIREMENTS:
-            1. DO NOT use markdown syntax or code blocks
-            2. Use plain text formatting with these conventions:
-               - Main headings: Start with "# " (e.g., "# Patient Summary")
-               - Subheadings: Start with "## " (e.g., "## Strengths")
-               - Bullet points: Start with "* " (e.g., "* Fine motor skills improving")
-               - Nested bullets: Start with "  * " (with two spaces)
-            3. Include clear section breaks between major sections. dont use extra spaces after section break
-            4. Start with a clear title and patient information section
+                FORMAT REQUIREMENTS:
+                1. DO NOT use markdown syntax or code blocks
+                2. Use plain text formatting with these conventions:
+                   - Main headings: Start with "# " (e.g., "# Patient Summary")
+                   - Subheadings: Start with "## " (e.g., "## Strengths")
+                   - Bullet points: Start with "* " (e.g., "* Fine motor skills improving")
+                   - Nested bullets: Start with "  * " (with two spaces)
+                3. Include clear section breaks between major sections. dont use extra spaces after section break
+                4. Start with a clear title and patient information section
             
-            CONTENT REQUIREMENTS:
-            - Summarize overall performance and key trends
-            - Highlight strengths and positive progress
-            - Identify areas needing attention or improvement
-            - Provide clear, actionable recommendations and next steps
-            - Maintain a professional, supportive tone suitable for parents and caregivers
+                CONTENT REQUIREMENTS:
+                - Summarize overall performance and key trends
+                - Highlight strengths and positive progress
+                - Identify areas needing attention or improvement
+                - Provide clear, actionable recommendations and next steps
+                - Maintain a professional, supportive tone suitable for parents and caregivers
             
-            The output will be formatted as a PDF, so ensure proper spacing and organization.
-            """
-        )
+                The output will be formatted as a PDF, so ensure proper spacing and organization.
+                """
+            )
 
-        user_prompt = {
-            'reportType': req.reportType,
-            'dateRange': {
-                'start': req.startDate.isoformat() if req.startDate else None,
-                'end': req.endDate.isoformat() if req.endDate else None,
-            },
-            'patient': patient_info,
-            'stats': stats,
-            'assessmentsSample': assessments_preview,
-            'workoutsSample': workouts_preview,
-        }
+            user_prompt = {
+                'reportType': req.reportType,
+                'dateRange': {
+                    'start': req.startDate.isoformat() if req.startDate else None,
+                    'end': req.endDate.isoformat() if req.endDate else None,
+                },
+                'patient': patient_info,
+                'stats': stats,
+                'assessmentsSample': assessments_preview,
+                'workoutsSample': workouts_preview,
+            }
 
-        try:
-            if content is None:
+            try:
                 model = genai.GenerativeModel(GEMINI_MODEL_NAME, system_instruction=system_instructions)
-                # Send only a user message payload to avoid 'system role' errors
-                result = model.generate_content(json.dumps(user_prompt, indent=2))
-                content = getattr(result, 'text', None) or "No content generated."
-        except Exception as e:
-            # Graceful fallback instead of 500 so the UI can still download a text
-            content = (
-                "AI generation failed. Fallback summary based on available data.\n"
-                f"Reason: {e}\n"
-                f"Active Patients: {stats['activePatients']}\n"
-                f"Average Progress: {stats['averageProgress']}%\n"
-                f"Total Workouts: {stats['homeWorkouts']}\n"
-            )
+                # Send only a user message payload to avoid 'system role' errors.
+                # The SDK call is blocking, so keep it off the event loop.
+                result = await asyncio.to_thread(
+                    model.generate_content, orjson.dumps(user_prompt, option=orjson.OPT_INDENT_2).decode()
+                )
+                text = getattr(result, 'text', None)
+                if text:
+                    _REPORT_CACHE[cache_key] = text
+                content = text or "No content generated."
+            except Exception as e:
+                # Graceful fallback instead of 500 so the UI can still download a text
+                content = (
+                    "AI generation failed. Fallback summary based on available data.\n"
+                    f"Reason: {e}\n"
+                    f"Active Patients: {stats['activePatients']}\n"
+                    f"Average Progress: {stats['averageProgress']}%\n"
+                    f"Total Workouts: {stats['homeWorkouts']}\n"
+                )
 
     # Return as PDF or text JSON depending on request
     wants_pdf = (req.format or "").lower() == "pdf" or "application/pdf" in (request.headers.get("accept", "").lower())
@@ -703,8 +959,9 @@ async def generate_report(req: ReportRequest, request: Request):
             clean_content = clean_content.replace('\n\n\n', '\n\n')
         
         title = f"{(patient_info or {}).get('name', 'Patient Report')} - {req.reportType.title()}"
-        pdf_bytes = _build_pdf_bytes(title, clean_content)
-        return StreamingResponse(iter([pdf_bytes]), media_type="application/pdf", headers={
+        # reportlab's build is CPU-bound; run it in the threadpool
+        pdf_stream = await asyncio.to_thread(_build_pdf_stream, title, clean_content)
+        return StreamingResponse(_iter_buffer(pdf_stream), media_type="application/pdf", headers={
             "Content-Disposition": f"attachment; filename=report_{req.reportType}_{(patient_info or {}).get('id','all')}.pdf"
         })
 
@@ -749,5 +1006,10 @@ async def serve_frontend(request: Request, full_path: str):
 
 if __name__ == "__main__":
     import uvicorn
-    # Run on port 3000 to match existing frontend fetch URLs
-    uvicorn.run("backend.app:app", host="0.0.0.0", port=3000, reload=True)
+    # Run on port 3000 to match existing frontend fetch URLs.
+    # One worker per core on httptools; each worker keeps its own file/report caches.
+    # loop="auto" picks uvloop where it is installed (not on Windows) and asyncio otherwise.
+    uvicorn.run(
+        "backend.app:app", host="0.0.0.0", port=3000,
+        workers=os.cpu_count(), loop="auto", http="httptools", log_level="warning",
+    )